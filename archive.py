@@ -0,0 +1,194 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+import os
+
+ARCHIVE_DIR = "archive"
+
+SUMMARY_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("generated_at", pa.timestamp("s")),
+    ("period_start", pa.date32()),
+    ("period_end", pa.date32()),
+    ("time_period", pa.string()),
+    ("key_findings", pa.string()),
+    ("major_trends", pa.list_(pa.string())),
+    ("patient_impact", pa.string()),
+    ("future_outlook", pa.string()),
+    ("tools_used", pa.list_(pa.string())),
+])
+
+DEVELOPMENT_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("date", pa.date32()),
+    ("year", pa.int32()),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("category_key", pa.string()),
+    ("title", pa.string()),
+    ("description", pa.string()),
+    ("impact", pa.string()),
+    ("source", pa.string()),
+])
+
+# Developments are laid out as developments/year=YYYY/part-<run_id>-0.parquet
+YEAR_PARTITIONING = ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive")
+
+PERIOD_FIELDS = {
+    "year": [],
+    "quarter": [("quarter", pc.quarter)],
+    "month": [("month", pc.month)],
+}
+
+
+def _parse_date(value) -> Optional[date]:
+    text = str(value).strip()
+    for fmt, length in (("%Y-%m-%d", 10), ("%Y-%m", 7), ("%Y", 4)):
+        try:
+            return datetime.strptime(text[:length], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class DevelopmentArchive:
+    """Append-only Parquet archive of every generated TimelineSummary.
+
+    Each run adds new segment files and never rewrites old ones. Developments are
+    partitioned by year and sorted by date and category within a segment, so
+    date-range and category queries prune whole files and row groups and trend
+    questions are answered by a local scan without any LLM or search calls.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self.summaries_path = os.path.join(root, "summaries")
+        self.developments_path = os.path.join(root, "developments")
+
+    def append(self, summary: dict, run_id: str, start_date: str, end_date: str) -> int:
+        """Archive one summary and its developments; returns the number of development rows written"""
+        summary_row = {
+            "run_id": run_id,
+            "generated_at": datetime.now().replace(microsecond=0),
+            "period_start": _parse_date(start_date),
+            "period_end": _parse_date(end_date),
+            "time_period": summary.get("time_period", ""),
+            "key_findings": summary.get("key_findings", ""),
+            "major_trends": [str(trend) for trend in summary.get("major_trends", [])],
+            "patient_impact": summary.get("patient_impact", ""),
+            "future_outlook": summary.get("future_outlook", ""),
+            "tools_used": [str(tool) for tool in summary.get("tools_used", [])],
+        }
+        self._write(pa.Table.from_pylist([summary_row], schema=SUMMARY_SCHEMA), self.summaries_path, run_id)
+
+        rows = []
+        for dev in summary.get("notable_developments", []):
+            dev_date = _parse_date(dev.get("date", ""))
+            category = str(dev.get("category", "")).strip()
+            rows.append({
+                "run_id": run_id,
+                "date": dev_date,
+                "year": dev_date.year if dev_date else None,
+                "category": category,
+                "category_key": category.lower(),
+                "title": dev.get("title", ""),
+                "description": dev.get("description", ""),
+                "impact": dev.get("impact", ""),
+                "source": dev.get("source", ""),
+            })
+        if rows:
+            table = pa.Table.from_pylist(rows, schema=DEVELOPMENT_SCHEMA)
+            table = table.sort_by([("date", "ascending"), ("category_key", "ascending")])
+            self._write(table, self.developments_path, run_id, partitioning=YEAR_PARTITIONING)
+        return len(rows)
+
+    def _write(self, table: pa.Table, path: str, run_id: str, partitioning=None):
+        ds.write_dataset(
+            table,
+            path,
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=f"part-{run_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def _dataset(self, path: str, schema: pa.Schema, partitioning=None):
+        if not os.path.isdir(path):
+            return None
+        return ds.dataset(path, format="parquet", partitioning=partitioning, schema=schema)
+
+    def summaries(self) -> pa.Table:
+        dataset = self._dataset(self.summaries_path, SUMMARY_SCHEMA)
+        return dataset.to_table() if dataset else SUMMARY_SCHEMA.empty_table()
+
+    def developments(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        categories: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        distinct: bool = True,
+    ) -> pa.Table:
+        """Developments in [start, end] for the given categories (case-insensitive).
+
+        With distinct=True the same development reported by overlapping runs is counted once.
+        """
+        dataset = self._dataset(self.developments_path, DEVELOPMENT_SCHEMA, YEAR_PARTITIONING)
+        if dataset is None:
+            return DEVELOPMENT_SCHEMA.empty_table()
+
+        conditions = []
+        if start:
+            conditions += [ds.field("year") >= start.year, ds.field("date") >= start]
+        if end:
+            conditions += [ds.field("year") <= end.year, ds.field("date") <= end]
+        if categories:
+            conditions.append(ds.field("category_key").isin([c.strip().lower() for c in categories]))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        needed = None
+        if columns:
+            needed = list(dict.fromkeys(columns + (["date", "title"] if distinct else [])))
+        table = dataset.to_table(columns=needed, filter=expression)
+
+        if distinct and table.num_rows:
+            seen = set()
+            keep = []
+            for key in zip(table["date"].to_pylist(), pc.utf8_lower(table["title"]).to_pylist()):
+                keep.append(key not in seen)
+                seen.add(key)
+            table = table.filter(pa.array(keep))
+        return table
+
+    def count_by_period(
+        self,
+        freq: str = "quarter",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        categories: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, int]]:
+        """Development counts per year, quarter or month, e.g. FDA approvals per quarter"""
+        if freq not in PERIOD_FIELDS:
+            raise ValueError(f"freq must be one of {', '.join(PERIOD_FIELDS)}")
+
+        table = self.developments(start, end, categories, columns=["date"])
+        table = table.filter(pc.is_valid(table["date"]))
+        keys = ["_year"]
+        table = table.append_column("_year", pc.year(table["date"]))
+        for name, func in PERIOD_FIELDS[freq]:
+            table = table.append_column(f"_{name}", func(table["date"]))
+            keys.append(f"_{name}")
+
+        counts = table.group_by(keys).aggregate([("date", "count")]).sort_by([(k, "ascending") for k in keys])
+        results = []
+        for row in counts.to_pylist():
+            label = str(row["_year"])
+            if freq == "quarter":
+                label += f"-Q{row['_quarter']}"
+            elif freq == "month":
+                label += f"-{row['_month']:02d}"
+            results.append((label, row["date_count"]))
+        return results
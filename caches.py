@@ -0,0 +1,129 @@
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from typing import Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = ".cache"
+
+# Search results go stale, so entries expire; override with HEALTH_AGENT_CACHE_TTL (seconds)
+DEFAULT_TOOL_CACHE_TTL = float(os.getenv("HEALTH_AGENT_CACHE_TTL", 24 * 3600))
+
+# Cached LLM turns expire too, so a bad answer can't be replayed indefinitely; override with HEALTH_AGENT_LLM_CACHE_TTL (seconds)
+DEFAULT_LLM_CACHE_TTL = float(os.getenv("HEALTH_AGENT_LLM_CACHE_TTL", 24 * 3600))
+
+
+class ToolResultCache:
+    """SQLite-backed tool result cache shared between processes.
+
+    The scheduler warms it off-peak and on-demand runs read from it, so the same
+    search for the same period is only paid for once per TTL window.
+    """
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "tools.db"), ttl: float = DEFAULT_TOOL_CACHE_TTL):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)")
+
+    @staticmethod
+    def make_key(name: str, args: tuple, kwargs: dict) -> str:
+        return json.dumps([name, list(args), kwargs], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is None:
+                row = self._conn.execute("SELECT value, stored_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    hit = (row[0], row[1])
+                    self._memory[key] = hit
+        if hit is None or now - hit[1] > self.ttl:
+            return None
+        return hit[0]
+
+    def set(self, key: str, value: str):
+        stored_at = time.time()
+        with self._lock:
+            self._memory[key] = (value, stored_at)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, value, stored_at),
+                )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            with self._conn:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            with self._conn:
+                self._conn.execute("DELETE FROM results")
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain LLM cache on the same expiring SQLite store as tool results.
+
+    Responses served from the cache are tagged with generation_info["cached"] so
+    latency tracking can ignore them. The last entry each thread stored or served
+    can be dropped with `discard_last`, e.g. when the answer turned out unusable.
+    """
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "llm.db"), ttl: float = DEFAULT_LLM_CACHE_TTL):
+        self._store = ToolResultCache(path, ttl)
+        self._local = threading.local()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return json.dumps([prompt, llm_string])
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self._key(prompt, llm_string)
+        value = self._store.get(key)
+        if value is None:
+            return None
+        self._local.last_key = key
+        generations = [loads(item, allowed_objects=[ChatGeneration, AIMessage]) for item in json.loads(value)]
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), "cached": True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        key = self._key(prompt, llm_string)
+        self._store.set(key, json.dumps([dumps(generation) for generation in return_val]))
+        self._local.last_key = key
+
+    def clear(self, **kwargs):
+        self._store.clear()
+
+    def discard_last(self):
+        key = getattr(self._local, "last_key", None)
+        if key is not None:
+            self._store.delete(key)
+            self._local.last_key = None
+
+
+def enable_llm_cache(path: str = os.path.join(CACHE_DIR, "llm.db"), ttl: float = DEFAULT_LLM_CACHE_TTL):
+    """Cache identical LLM calls on disk so warmed prompts are answered without a request"""
+    set_llm_cache(LLMResponseCache(path, ttl))
+
+
+def discard_last_llm_response():
+    """Drop the LLM response this thread last cached or read, so a bad answer isn't replayed"""
+    cache = get_llm_cache()
+    if isinstance(cache, LLMResponseCache):
+        cache.discard_last()
@@ -0,0 +1,168 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+
+from latency import LatencyStats
+
+# Per-source deadlines in seconds; override with HEALTH_AGENT_DEADLINE_<SOURCE>, e.g. HEALTH_AGENT_DEADLINE_PUBMED=30
+DEFAULT_DEADLINES = {
+    "duckduckgo": 10.0,
+    "pubmed": 20.0,
+    "arxiv": 20.0,
+    "clinicaltrials": 15.0,
+    "wikipedia": 10.0,
+}
+
+PARTIAL_PREFIX = "[PARTIAL:"
+
+# Worker threads per source; a source whose calls hang can only tie up its own workers.
+# Override with HEALTH_AGENT_SOURCE_WORKERS
+DEFAULT_SOURCE_WORKERS = 4
+
+
+class SourceResult:
+    """Outcome of a backend call; partial is True when the source timed out, failed or was skipped"""
+
+    def __init__(self, source: str, value: Any = None, partial: bool = False, reason: str = ""):
+        self.source = source
+        self.value = value
+        self.partial = partial
+        self.reason = reason
+
+    def marker(self) -> str:
+        return f"{PARTIAL_PREFIX} {self.source} {self.reason}]"
+
+    def as_text(self, empty: str = "No results available.") -> str:
+        if self.partial:
+            return f"{self.marker()}\n{empty}"
+        return self.value
+
+
+class CircuitBreaker:
+    """Skips a source for a cooldown window after repeated consecutive failures"""
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.open_until - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # After the cooldown one trial call goes through; another failure reopens the breaker
+            if self.failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+
+class CallPolicy:
+    """Deadlines, hedged requests and circuit breakers for the search backends in tools.py.
+
+    A call that hasn't returned by the source's p95 latency gets a duplicate request
+    and the first answer wins. Nothing waits past the source deadline: the caller gets
+    a partial result instead, so one hung upstream can't stall the whole agent run.
+    Each source gets its own small thread pool, so calls stuck on one backend never
+    starve the others.
+    """
+
+    min_samples = 5
+
+    def __init__(
+        self,
+        deadlines: Dict[str, float],
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        hedge: bool = True,
+        workers_per_source: int = DEFAULT_SOURCE_WORKERS,
+    ):
+        self.deadlines = deadlines
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.workers_per_source = workers_per_source
+        self.stats: Dict[str, LatencyStats] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CallPolicy":
+        deadlines = {
+            source: float(os.getenv(f"HEALTH_AGENT_DEADLINE_{source.upper()}", deadline))
+            for source, deadline in DEFAULT_DEADLINES.items()
+        }
+        return cls(
+            deadlines,
+            failure_threshold=int(os.getenv("HEALTH_AGENT_BREAKER_FAILURES", 3)),
+            cooldown=float(os.getenv("HEALTH_AGENT_BREAKER_COOLDOWN", 60)),
+            hedge=os.getenv("HEALTH_AGENT_HEDGE_SEARCHES", "1") != "0",
+            workers_per_source=int(os.getenv("HEALTH_AGENT_SOURCE_WORKERS", DEFAULT_SOURCE_WORKERS)),
+        )
+
+    def deadline(self, source: str) -> float:
+        return self.deadlines.get(source, 15.0)
+
+    def _state(self, source: str):
+        with self._lock:
+            if source not in self.stats:
+                self.stats[source] = LatencyStats()
+                self.breakers[source] = CircuitBreaker(self.failure_threshold, self.cooldown)
+                self._pools[source] = ThreadPoolExecutor(max_workers=self.workers_per_source, thread_name_prefix=f"{source}-call")
+            return self.stats[source], self.breakers[source], self._pools[source]
+
+    def _hedge_delay(self, stats: LatencyStats, deadline: float) -> Optional[float]:
+        if not self.hedge:
+            return None
+        if len(stats.samples) >= self.min_samples:
+            return min(stats.percentile(0.95), deadline)
+        return deadline / 2
+
+    def call(self, source: str, fn, *args, **kwargs) -> SourceResult:
+        stats, breaker, pool = self._state(source)
+        if breaker.remaining() > 0:
+            return SourceResult(source, partial=True, reason=f"skipped, circuit open for another {breaker.remaining():.0f}s")
+
+        deadline = self.deadline(source)
+        started = time.monotonic()
+        pending = {pool.submit(fn, *args, **kwargs)}
+        hedge_delay = self._hedge_delay(stats, deadline)
+        error = None
+
+        while pending:
+            elapsed = time.monotonic() - started
+            if elapsed >= deadline:
+                break
+            timeout = deadline - elapsed
+            if hedge_delay is not None:
+                timeout = min(timeout, max(0.0, hedge_delay - elapsed))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    stats.record(time.monotonic() - started)
+                    breaker.record_success()
+                    return SourceResult(source, value=future.result())
+                error = future.exception()
+            if hedge_delay is not None and time.monotonic() - started >= hedge_delay:
+                # Fire one duplicate request, then stop hedging
+                pending.add(pool.submit(fn, *args, **kwargs))
+                hedge_delay = None
+
+        stats.record_error()
+        breaker.record_failure()
+        if pending:
+            return SourceResult(source, partial=True, reason=f"timed out after {deadline:.0f}s")
+        return SourceResult(source, partial=True, reason=f"failed: {error}")
+
+
+call_policy = CallPolicy.from_env()
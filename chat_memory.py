@@ -0,0 +1,96 @@
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from typing import Callable, List, Optional
+import tiktoken
+
+_encoding = None
+
+
+def _get_encoding():
+    # Loaded on first use: tiktoken may download the BPE file, which plain timeline runs never need
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    return len(_get_encoding().encode(text))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    tokens = _get_encoding().encode(text)
+    return text if len(tokens) <= limit else _get_encoding().decode(tokens[:limit])
+
+
+class RollingChatMemory:
+    """Chat history with locally counted, incrementally maintained token totals.
+
+    Each message is tokenized once when it is added. When the history grows past
+    max_token_limit the oldest turns are evicted and folded into a running summary
+    by `summarize`, so earlier context is condensed instead of silently dropped.
+    The summary itself is kept to a quarter of the limit (summary_token_limit).
+    """
+
+    def __init__(self, summarize: Callable[[str, str], str], max_token_limit: int = 1000, summary_token_limit: Optional[int] = None):
+        self.summarize = summarize
+        self.max_token_limit = max_token_limit
+        self.summary_token_limit = summary_token_limit or max_token_limit // 4
+        self.context: Optional[SystemMessage] = None
+        self.summary = ""
+        self._turns: List[List[BaseMessage]] = []
+        self._turn_tokens: List[int] = []
+        self._summary_tokens = 0
+        self.total_tokens = 0
+
+    def set_context(self, text: str):
+        """Pin reference material (e.g. a generated timeline) ahead of the conversation; it is never evicted"""
+        self.context = SystemMessage(content=text)
+
+    def add_turn(self, user_message: str, ai_message: str):
+        turn = [HumanMessage(content=user_message), AIMessage(content=ai_message)]
+        tokens = count_tokens(user_message) + count_tokens(ai_message)
+        self._turns.append(turn)
+        self._turn_tokens.append(tokens)
+        self.total_tokens += tokens
+        self._evict()
+
+    def _evict(self):
+        # Always keep the latest turn so a follow-up can refer to it
+        count, remaining = 0, self.total_tokens
+        while remaining > self.max_token_limit and count < len(self._turns) - 1:
+            remaining -= self._turn_tokens[count]
+            count += 1
+        if not count:
+            return
+
+        transcript = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for turn in self._turns[:count]
+            for message in turn
+        )
+        # Summarize before dropping anything, so a failed summary leaves the history intact
+        summary = self._compress(self.summarize(self.summary, transcript))
+        summary_tokens = count_tokens(summary)
+        del self._turns[:count]
+        del self._turn_tokens[:count]
+        self.summary = summary
+        self.total_tokens = remaining - self._summary_tokens + summary_tokens
+        self._summary_tokens = summary_tokens
+
+    def _compress(self, summary: str) -> str:
+        """Keep the running summary within summary_token_limit so it can't crowd out the live turns"""
+        if count_tokens(summary) <= self.summary_token_limit:
+            return summary
+        # Fold the oversized summary into itself once, then cut whatever still doesn't fit
+        summary = self.summarize("", summary)
+        return truncate_tokens(summary, self.summary_token_limit)
+
+    def messages(self) -> List[BaseMessage]:
+        history: List[BaseMessage] = []
+        if self.context is not None:
+            history.append(self.context)
+        if self.summary:
+            history.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for turn in self._turns:
+            history.extend(turn)
+        return history
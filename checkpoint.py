@@ -0,0 +1,126 @@
+from langchain.agents.output_parsers.tools import ToolAgentAction
+from langchain_core.agents import AgentAction
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from datetime import datetime
+from typing import Optional
+import json
+import os
+import uuid
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+def _action_to_dict(action: AgentAction) -> dict:
+    return {
+        "tool": action.tool,
+        "tool_input": action.tool_input,
+        "log": action.log,
+        "tool_call_id": getattr(action, "tool_call_id", None),
+        "message_log": messages_to_dict(getattr(action, "message_log", [])),
+    }
+
+
+def _action_from_dict(data: dict) -> AgentAction:
+    if data.get("tool_call_id"):
+        return ToolAgentAction(
+            tool=data["tool"],
+            tool_input=data["tool_input"],
+            log=data["log"],
+            message_log=messages_from_dict(data["message_log"]),
+            tool_call_id=data["tool_call_id"],
+        )
+    return AgentAction(tool=data["tool"], tool_input=data["tool_input"], log=data["log"])
+
+
+class RunCheckpoint:
+    """On-disk record of a timeline run so it can be resumed after a failure.
+
+    Every planned tool call is written before it runs and its observation is
+    filled in once it returns, so a crash leaves the pending calls on disk.
+    """
+
+    def __init__(self, run_id: str, state: dict):
+        self.run_id = run_id
+        self.state = state
+
+    @property
+    def path(self) -> str:
+        return os.path.join(CHECKPOINT_DIR, f"{self.run_id}.json")
+
+    @classmethod
+    def create(cls, prompt: str, start_date: str, end_date: str, period_key: Optional[str] = None) -> "RunCheckpoint":
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        state = {
+            "input": prompt,
+            "start_date": start_date,
+            "end_date": end_date,
+            "period_key": period_key,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "steps": [],
+            "output": None,
+            "summary": None,
+        }
+        checkpoint = cls(run_id, state)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, run_id: str) -> "RunCheckpoint":
+        path = os.path.join(CHECKPOINT_DIR, f"{run_id}.json")
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(run_id, json.load(f))
+
+    def save(self):
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        # Write to a temp file first so a crash mid-write never corrupts the checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def steps(self) -> list:
+        """(index, action, observation) for every planned tool call, in order; observation is None if it never returned"""
+        return [
+            (index, _action_from_dict(step["action"]), step["observation"])
+            for index, step in enumerate(self.state["steps"])
+        ]
+
+    def record_actions(self, actions: list) -> list:
+        start = len(self.state["steps"])
+        for action in actions:
+            self.state["steps"].append({"action": _action_to_dict(action), "observation": None})
+        self.save()
+        return list(range(start, len(self.state["steps"])))
+
+    def record_observation(self, index: int, observation):
+        self.state["steps"][index]["observation"] = str(observation)
+        self.save()
+
+    def record_output(self, output: str):
+        self.state["output"] = output
+        self.save()
+
+    def clear_output(self):
+        """Forget an unusable final answer so a resume asks the agent again (completed steps are kept)"""
+        self.state["output"] = None
+        self.save()
+
+    def record_summary(self, summary: dict):
+        self.state["summary"] = summary
+        self.save()
+
+    def mark_archived(self):
+        self.state["archived"] = True
+        self.save()
+
+    def record_metrics(self, metrics: dict):
+        self.state["metrics"] = metrics
+        self.save()
+
+    @property
+    def output(self) -> Optional[str]:
+        return self.state["output"]
+
+    @property
+    def summary(self) -> Optional[dict]:
+        return self.state["summary"]
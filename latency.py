@@ -0,0 +1,36 @@
+from collections import deque
+import threading
+
+
+class LatencyStats:
+    """Rolling latency samples and error counts for one model or backend"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self.samples.append(latency)
+            self.calls += 1
+
+    def record_error(self):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+
+    def mean(self) -> float:
+        with self._lock:
+            return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
@@ -1,35 +1,43 @@
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.chains import LLMChain
-from langchain.memory import ConversationTokenBufferMemory
 from langchain_core.messages import SystemMessage
+from langchain_core.agents import AgentFinish
 from langchain_core.prompts.chat import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     MessagesPlaceholder,
 )
-from datetime import datetime, timedelta
+from datetime import datetime
 import warnings
 from langchain_core._api.deprecation import LangChainDeprecationWarning
 import os
-import re
 import time
-import pdfkit
 import json
+import argparse
 
 warnings.filterwarnings("ignore", category=LangChainDeprecationWarning)
 
-# Import tools from the tools.py file
-from tools import health_timeline_tools, create_engaging_summary_tool
-
+# Load .env first: the router, call policy and caches read their settings at import time
 load_dotenv()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENROUTER_API_KEY")
 
+# Import tools from the tools.py file
+from tools import health_timeline_tools, create_engaging_summary_tool
+from checkpoint import RunCheckpoint
+from router import model_router
+from streaming import TimelineStreamHandler, DRAFT_TAG
+from chat_memory import RollingChatMemory
+from rendering import write_summary_html, save_summary_pdf, save_summary_pdfs
+from archive import DevelopmentArchive
+from published import load_published
+from periods import parse_period
+from caches import enable_llm_cache, discard_last_llm_response
+
 class HealthDevelopment(BaseModel):
     date: str = Field(description="Date of the development in YYYY-MM-DD format")
     title: str = Field(description="Brief title of the development")
@@ -52,14 +60,11 @@ class ChatResponse(BaseModel):
     sources: List[str] = []
     tools_used: List[str] = []
 
-def get_llm(temperature=0.5):
-    return ChatOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        model="openrouter/quasar-alpha",
-        temperature=temperature
-    )
-
-llm = get_llm(temperature=0.5)
+# Streaming only changes how tokens arrive; callers that don't listen for them see no difference.
+# The fast tier picks tools turn by turn and the strong tier writes the final timeline.
+tool_llm = model_router.get_llm("tool_selection", temperature=0.5, streaming=True)
+llm = model_router.get_llm("synthesis", temperature=0.5, streaming=True)
+chat_llm = model_router.get_llm("chat", temperature=0.5)
 
 timeline_parser = PydanticOutputParser(pydantic_object=TimelineSummary)
 
@@ -80,12 +85,19 @@ timeline_prompt = ChatPromptTemplate.from_messages(
 ).partial(format_instructions=timeline_parser.get_format_instructions())
 
 timeline_agent = create_tool_calling_agent(
+    llm=tool_llm,
+    prompt=timeline_prompt,
+    tools=health_timeline_tools
+)
+
+synthesis_agent = create_tool_calling_agent(
     llm=llm,
     prompt=timeline_prompt,
     tools=health_timeline_tools
 )
 
 timeline_executor = AgentExecutor(agent=timeline_agent, tools=health_timeline_tools, verbose=True)
+timeline_tools_by_name = {tool.name: tool for tool in health_timeline_tools}
 
 chat_parser = PydanticOutputParser(pydantic_object=ChatResponse)
 chat_prompt = ChatPromptTemplate.from_messages(
@@ -103,10 +115,8 @@ chat_prompt = ChatPromptTemplate.from_messages(
     ]
 ).partial(format_instructions=chat_parser.get_format_instructions())
 
-memory = ConversationTokenBufferMemory(llm=llm, max_token_limit=1000)
-
 chat_agent = create_tool_calling_agent(
-    llm=llm,
+    llm=chat_llm,
     prompt=chat_prompt,
     tools=health_timeline_tools
 )
@@ -114,166 +124,293 @@ chat_agent = create_tool_calling_agent(
 chat_executor = AgentExecutor(
     agent=chat_agent,
     tools=health_timeline_tools,
-    memory=memory,
     verbose=True
 )
 
-def parse_time_period(period_text):
-    today = datetime.now()
-    period_text = period_text.lower()
-
-    year_range_match = re.search(r'(\d{4})\s*[-–—to]*\s*(\d{4})', period_text)
-    single_year_match = re.search(r'\b(20\d{2})\b', period_text)
-
-    if year_range_match:
-        start_year = int(year_range_match.group(1))
-        end_year = int(year_range_match.group(2))
-        start_date = datetime(start_year, 1, 1)
-        end_date = datetime(end_year, 12, 31)
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    elif single_year_match:
-        year = int(single_year_match.group(1))
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31)
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    elif "last week" in period_text:
-        end_date = today
-        start_date = today - timedelta(days=7)
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    elif "last month" in period_text:
-        end_date = today
-        start_date = today - timedelta(days=30)
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    elif "last year" in period_text:
-        end_date = today
-        start_date = today - timedelta(days=365)
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    elif "this year" in period_text:
-        start_date = datetime(today.year, 1, 1)
-        end_date = today
-        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    
-    # Default to last 3 months if time period can't be determined
-    end_date = today
-    start_date = today - timedelta(days=90)
-    return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-
-def generate_email_html_from_summary(summary: dict) -> str:
-    return f"""
-    <html>
-    <head>
-        <meta charset='UTF-8'>
-        <style>
-            body {{ font-family: 'Segoe UI', sans-serif; padding: 30px; color: #333; line-height: 1.6; }}
-            h1 {{ color: #0a74da; }}
-            h2 {{ border-bottom: 1px solid #ddd; padding-bottom: 5px; }}
-            .section {{ margin-bottom: 30px; }}
-            .development {{ margin-bottom: 20px; }}
-            a {{ color: #0a74da; text-decoration: underline; }}
-        </style>
-    </head>
-    <body>
-        <h1>Health and Medical Timeline: {summary['time_period']}</h1>
-
-        <div class='section'>
-            <h2>🧠 Key Findings</h2>
-            <p>{summary['key_findings']}</p>
-        </div>
-
-        <div class='section'>
-            <h2>📈 Major Trends</h2>
-            <ul>
-                {''.join(f"<li>{trend}</li>" for trend in summary['major_trends'])}
-            </ul>
-        </div>
-
-        <div class='section'>
-            <h2>🌟 Notable Developments</h2>
-            {''.join(f"""
-            <div class='development'>
-                <strong>{dev['date']}: {dev['title']}</strong>
-                <p>{dev['description']}</p>
-                <p><em>Impact:</em> {dev['impact']}</p>
-                <p><strong>Category:</strong> {dev['category']}</p>
-            </div>
-            """ for dev in summary['notable_developments'])}
-        </div>
-
-        <div class='section'>
-            <h2>💡 Patient Impact</h2>
-            <p>{summary['patient_impact']}</p>
-        </div>
-
-        <div class='section'>
-            <h2>🔮 Future Outlook</h2>
-            <p>{summary['future_outlook']}</p>
-        </div>
-
-        <div class='section'>
-            <h2>📚 Sources</h2>
-            <ul>
-                <li>Wikipedia</li>
-                <li>DuckDuckGo</li>
-                <li>PubMed</li>
-                <li>ArXiv</li>
-                <li>ClinicalTrials.gov</li>
-            </ul>
-        </div>
-    </body>
-    </html>
-    """
-
-
-def save_summary_pdf(summary, filename):
-    html = generate_email_html_from_summary(summary)
-    
-    config = pdfkit.configuration(wkhtmltopdf=r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe")
-    pdfkit.from_string(html, filename, configuration=config)
+chat_history_summary_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", "You condense chat transcripts about health and medical developments. Keep facts, dates, sources and open questions; drop pleasantries."),
+        ("human", "Existing summary:\n{summary}\n\nNew lines of conversation:\n{transcript}\n\nUpdated summary:"),
+    ]
+)
 
+def summarize_chat_history(summary, transcript):
+    prompt = chat_history_summary_prompt.format_prompt(summary=summary or "(none)", transcript=transcript)
+    return model_router.invoke("chat_history_summary", prompt, temperature=0.3).content
 
+def parse_time_period(period_text):
+    period = parse_period(period_text)
+    return period.start_date, period.end_date
+
+def run_timeline_tool(action, callbacks=None):
+    tool = timeline_tools_by_name.get(action.tool)
+    if tool is None:
+        return f"{action.tool} is not a valid tool, try one of [{', '.join(timeline_tools_by_name)}]."
+    return tool.run(action.tool_input, verbose=callbacks is None, callbacks=callbacks)
+
+
+def run_timeline(checkpoint, callbacks=None):
+    """Drive the timeline agent one step at a time, checkpointing every LLM turn and tool result"""
+    if checkpoint.output is not None:
+        return checkpoint.output
+
+    # Replay completed steps from the checkpoint and finish any tool calls that never returned
+    intermediate_steps = []
+    for index, action, observation in checkpoint.steps():
+        if observation is None:
+            print(f"↻ Re-running incomplete tool call: {action.tool}")
+            observation = run_timeline_tool(action, callbacks)
+            checkpoint.record_observation(index, observation)
+        intermediate_steps.append((action, observation))
+
+    agent, tags = timeline_agent, [DRAFT_TAG]
+    for _ in range(timeline_executor.max_iterations):
+        output = agent.invoke(
+            {"input": checkpoint.state["input"], "intermediate_steps": intermediate_steps},
+            config={"callbacks": callbacks, "tags": tags},
+        )
+        if isinstance(output, AgentFinish) and agent is timeline_agent:
+            # The fast model has gathered enough; the strong model writes the answer from the same steps
+            # (it may still ask for more tools, in which case it keeps driving)
+            agent, tags = synthesis_agent, []
+            output = agent.invoke(
+                {"input": checkpoint.state["input"], "intermediate_steps": intermediate_steps},
+                config={"callbacks": callbacks, "tags": tags},
+            )
+        if isinstance(output, AgentFinish):
+            checkpoint.record_output(output.return_values["output"])
+            return checkpoint.output
+
+        actions = output if isinstance(output, list) else [output]
+        for index, action in zip(checkpoint.record_actions(actions), actions):
+            observation = run_timeline_tool(action, callbacks)
+            checkpoint.record_observation(index, observation)
+            intermediate_steps.append((action, observation))
+
+    checkpoint.record_output("Agent stopped due to iteration limit or time limit.")
+    return checkpoint.output
+
+
+def build_timeline_request(start_date, end_date):
+    return f"Generate a health and medical development timeline between {start_date} and {end_date}."
+
+
+def generate_summary(checkpoint, callbacks=None, show_output=True):
+    """Run (or finish) a checkpointed timeline run and archive its summary; None if the output isn't valid JSON"""
+    if checkpoint.summary is not None:
+        summary = checkpoint.summary
+    else:
+        output = run_timeline(checkpoint, callbacks)
+        if show_output:
+            print("🧪 Raw output:", output)  # for debugging
+
+        try:
+            summary = json.loads(output)
+        except json.JSONDecodeError:
+            print("⚠️ Failed to parse JSON from output:")
+            print(output)
+            # Don't let a stored or cached copy of this answer be replayed on the next attempt
+            checkpoint.clear_output()
+            discard_last_llm_response()
+            print(f"↻ Completed tool calls are saved; retry the final answer with: python main.py --resume {checkpoint.run_id}")
+            return None
+        checkpoint.record_summary(summary)
+
+    # Archive before rendering so a PDF failure can't lose the run's history
+    if not checkpoint.state.get("archived"):
+        rows = DevelopmentArchive().append(summary, checkpoint.run_id, checkpoint.state["start_date"], checkpoint.state["end_date"])
+        checkpoint.mark_archived()
+        print(f"🗄️ Archived {rows} development(s).")
+    return summary
+
+
+def save_reports(summary):
+    write_summary_html(summary, "health_summary.html")
+    save_summary_pdf(summary, "health_summary.pdf")
+    print("✅ Report saved as 'health_summary.html' and 'health_summary.pdf'.")
+
+
+def rerender_checkpoints(run_ids, output_dir="reports"):
+    os.makedirs(output_dir, exist_ok=True)
+    summaries = []
+    for run_id in run_ids:
+        try:
+            summary = RunCheckpoint.load(run_id).summary
+        except FileNotFoundError:
+            print(f"⚠️ No checkpoint found for run {run_id}, skipping.")
+            continue
+        if summary is None:
+            print(f"⚠️ Run {run_id} has no saved summary, skipping.")
+            continue
+        write_summary_html(summary, os.path.join(output_dir, f"{run_id}.html"))
+        summaries.append((summary, os.path.join(output_dir, f"{run_id}.pdf")))
+
+    started = time.time()
+    try:
+        save_summary_pdfs(summaries)
+    except Exception as e:
+        print("❌ Error while saving PDFs:", e)
+        # Any run whose PDF wasn't (re)written by this call only got its HTML report
+        html_only = [
+            os.path.splitext(os.path.basename(pdf))[0] for _, pdf in summaries
+            if not os.path.exists(pdf) or os.path.getmtime(pdf) < started
+        ]
+        print(f"⚠️ HTML only (no fresh PDF) in '{output_dir}/' for: {', '.join(html_only)}")
+        return
+    print(f"✅ Re-rendered {len(summaries)} report(s) into '{output_dir}/'.")
+
+
+def run_chat(summary=None):
+    memory = RollingChatMemory(summarize=summarize_chat_history, max_token_limit=1000)
+    if summary is not None:
+        # Follow-up questions about this timeline can be answered without searching again
+        memory.set_context(
+            "A health timeline has already been generated for this conversation. "
+            "Answer from it when possible and only use tools for information it does not cover:\n"
+            + json.dumps(summary, ensure_ascii=False)
+        )
+
+    print("💬 Chat mode: ask about health and medical developments (type 'exit' to quit).")
+    while True:
+        try:
+            query = input("\nYou: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if not query:
+            continue
+        if query.lower() in ("exit", "quit"):
+            break
+
+        try:
+            result = chat_executor.invoke({"query": query, "chat_history": memory.messages()})
+        except Exception as e:
+            print("❌ Error while answering:", e)
+            continue
+
+        try:
+            response = chat_parser.parse(result["output"])
+            message = response.message
+            if response.sources:
+                message += "\n\nSources: " + ", ".join(response.sources)
+        except Exception:
+            message = result["output"]
+
+        print(f"\n🩺 {message}")
+        try:
+            memory.add_turn(query, message)
+        except Exception as e:
+            # Token counting or summarizing old turns failed; the history is left as it was, so keep the session going
+            print("⚠️ Couldn't update the chat history:", e)
+
+
+def print_trend(categories, freq, years):
+    end = datetime.now().date()
+    # Start on a --by boundary so the first bucket counts a whole year, quarter or month
+    start = end.replace(year=end.year - years, day=1)
+    if freq == "year":
+        start = start.replace(month=1)
+    elif freq == "quarter":
+        start = start.replace(month=(start.month - 1) // 3 * 3 + 1)
+
+    started = time.perf_counter()
+    counts = DevelopmentArchive().count_by_period(freq, start, end, categories)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    label = ", ".join(categories) if categories else "All developments"
+    print(f"📈 {label} per {freq}, {start} to {end} (answered from the archive in {elapsed_ms:.1f} ms)")
+    if not counts:
+        print("No archived developments match.")
+    for period, count in counts:
+        print(f"  {period}: {count}")
 
 
 def main():
+    arg_parser = argparse.ArgumentParser(description="Health Timeline Assistant")
+    arg_parser.add_argument("--resume", metavar="RUN_ID", help="Resume a checkpointed run from its last incomplete step")
+    arg_parser.add_argument("--rerender", nargs="+", metavar="RUN_ID", help="Re-render saved summaries of checkpointed runs to reports/ without calling the agent")
+    arg_parser.add_argument("--chat", nargs="?", const="", metavar="RUN_ID", help="Start an interactive chat, optionally grounded in a checkpointed run's summary")
+    arg_parser.add_argument("--trend", nargs="*", metavar="CATEGORY", help="Count archived developments per period, optionally only for these categories (e.g. 'FDA Approval')")
+    arg_parser.add_argument("--by", choices=["year", "quarter", "month"], default="quarter", help="Period size for --trend")
+    arg_parser.add_argument("--years", type=int, default=3, help="How many years back --trend looks")
+    arg_parser.add_argument("--fresh", action="store_true", help="Ignore prebuilt summaries and cached LLM responses and run the agent")
+    arg_parser.add_argument("--stream", action="store_true", help="Stream tool events and tokens, rendering the report as developments arrive")
+    args = arg_parser.parse_args()
+
     print("🩺 Health Timeline Assistant")
-    user_input = input("Enter the time period you want to analyze (e.g., 'last year', '2023-2024', 'this year'): ")
+    # Identical LLM calls (e.g. ones warmed by scheduler.py) are answered from disk unless --fresh;
+    # set HEALTH_AGENT_LLM_CACHE=0 to disable
+    if not args.fresh and os.getenv("HEALTH_AGENT_LLM_CACHE", "1") != "0":
+        enable_llm_cache()
+    if args.chat is not None:
+        summary = None
+        if args.chat:
+            try:
+                summary = RunCheckpoint.load(args.chat).summary
+            except FileNotFoundError:
+                arg_parser.error(f"no checkpoint found for run '{args.chat}'")
+            if summary is None:
+                arg_parser.error(f"run '{args.chat}' has no saved summary to chat about (finish it with --resume first)")
+        run_chat(summary)
+        return
+
+    if args.rerender:
+        rerender_checkpoints(args.rerender)
+        return
+
+    if args.trend is not None:
+        print_trend(args.trend, args.by, args.years)
+        return
+
+    if args.resume:
+        try:
+            checkpoint = RunCheckpoint.load(args.resume)
+        except FileNotFoundError:
+            arg_parser.error(f"no checkpoint found for run '{args.resume}'")
+        start_date, end_date = checkpoint.state["start_date"], checkpoint.state["end_date"]
+        print(f"\n↻ Resuming run {checkpoint.run_id} ({start_date} to {end_date})...\n")
+    else:
+        user_input = input("Enter the time period you want to analyze (e.g., 'last year', '2023-2024', 'Q1 2025', 'past 30 days'): ")
+
+        try:
+            period = parse_period(user_input)
+        except ValueError as e:
+            print("⚠️ Couldn't understand that period:", e)
+            return
+        start_date, end_date = period.start_date, period.end_date
 
-    start_date, end_date = parse_time_period(user_input)
-    print(f"\n🔎 Analyzing developments from {start_date} to {end_date}...\n")
+        published = None if args.fresh else load_published(period)
+        if published is not None:
+            print(f"\n⚡ Serving prebuilt summary for {period.label} (published {published['published_at']}).\n")
+            try:
+                save_reports(published["summary"])
+            except Exception as e:
+                print("❌ Error while saving report:", e)
+            return
 
-    prompt = f"Generate a health and medical development timeline between {start_date} and {end_date}."
+        print(f"\n🔎 Analyzing developments for {period.label}: {start_date} to {end_date}...\n")
 
-    try:
-        result = timeline_executor.invoke({"input": prompt})
-        print("🧪 Raw result:", result)  # for debugging
+        checkpoint = RunCheckpoint.create(build_timeline_request(start_date, end_date), start_date, end_date, period.key)
+    print(f"💾 Checkpointing to {checkpoint.path}\n")
 
-        # Extract and parse output
-        if isinstance(result, dict) and "output" in result:
-            try:
-                summary = json.loads(result["output"])
-            except json.JSONDecodeError:
-                print("⚠️ Failed to parse JSON from output:")
-                print(result["output"])
-                return
-        elif isinstance(result, dict) and all(k in result for k in ["time_period", "key_findings"]):
-            summary = result
-        elif isinstance(result, str):
-            print("⚠️ Got a string response instead of structured output:")
-            print(result)
-            return
-        else:
-            print("⚠️ Unexpected result format:", result)
+    stream_handler = TimelineStreamHandler() if args.stream else None
+    callbacks = [stream_handler] if stream_handler else None
+
+    try:
+        summary = generate_summary(checkpoint, callbacks, show_output=not args.stream)
+        if summary is None:
             return
 
-        # Save report
-        html = generate_email_html_from_summary(summary)
-        with open("health_summary.html", "w", encoding="utf-8") as f:
-            f.write(html)
-        save_summary_pdf(summary, "health_summary.pdf")
+        save_reports(summary)
 
-        print("✅ Report saved as 'health_summary.html' and 'health_summary.pdf'.")
+        if stream_handler:
+            stream_handler.finish()
+            checkpoint.record_metrics(stream_handler.metrics())
+            stream_handler.print_metrics()
+        print("📊 Model latency this run:\n" + model_router.report())
 
     except Exception as e:
         print("❌ Error while generating timeline:", e)
+        print(f"↻ Progress is saved; continue with: python main.py --resume {checkpoint.run_id}")
 
 if __name__ == "__main__":
     main()
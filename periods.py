@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+import calendar
+import hashlib
+import re
+
+MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): index for index, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+MONTH_PATTERN = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+DATE_SEPARATOR = r"\s*(?:to|until|through|thru|and|–|—|-|\.\.)\s*"
+ISO_DATE = r"(\d{4}-\d{1,2}-\d{1,2})"
+
+# Requests that can't be understood fall back to this many days up to today
+DEFAULT_DAYS = 90
+
+
+@dataclass(frozen=True)
+class Period:
+    """A canonical date range. Equal requests produce equal periods, and therefore equal keys."""
+
+    start: date
+    end: date
+    granularity: str
+    label: str
+
+    @property
+    def start_date(self) -> str:
+        return self.start.isoformat()
+
+    @property
+    def end_date(self) -> str:
+        return self.end.isoformat()
+
+    @property
+    def key(self) -> str:
+        """Stable hash of the range, for cache keys, shard routing and request coalescing"""
+        return hashlib.sha256(f"{self.start_date}/{self.end_date}".encode()).hexdigest()[:16]
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _shift_months(year: int, month: int, delta: int):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def _quarter(year: int, quarter: int) -> Period:
+    start = date(year, 3 * quarter - 2, 1)
+    return Period(start, _month_end(year, 3 * quarter), "quarter", f"{year}-Q{quarter}")
+
+
+def _month(year: int, month: int) -> Period:
+    return Period(date(year, month, 1), _month_end(year, month), "month", f"{calendar.month_name[month]} {year}")
+
+
+def _year(year: int) -> Period:
+    return Period(date(year, 1, 1), date(year, 12, 31), "year", str(year))
+
+
+def _week(start: date) -> Period:
+    return Period(start, start + timedelta(days=6), "week", f"week of {start.isoformat()}")
+
+
+def _days(start: date, end: date) -> Period:
+    if start > end:
+        start, end = end, start
+    label = start.isoformat() if start == end else f"{start.isoformat()} to {end.isoformat()}"
+    return Period(start, end, "day", label)
+
+
+def _parse_iso(text: str) -> date:
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def parse_period(period_text: str, today: Optional[date] = None) -> Period:
+    """Parse a free-text period into a canonical range aligned to day, week, month, quarter or year.
+
+    Understands ISO dates and ranges ("2024-01-15 to 2024-02-10", "since 2024-05-01"),
+    quarters ("Q3 2024", "last quarter"), months ("March 2024", "2024-03", "last month"),
+    year ranges and single years, "past N days/weeks/months/years" ("past week" means one)
+    and the fixed phrases (today, this/last week, month, quarter and year, year to date).
+    "Past N units" goes back N units from today and starts on that unit's boundary, so
+    requests made on the same day share a range. No period ends after today, since there
+    is no news from the future to look for. Anything else falls back to the past 90 days.
+    """
+    today = today or date.today()
+    period = _parse(period_text.lower().strip(), today)
+    if period.start <= today < period.end:
+        return Period(period.start, today, period.granularity, period.label)
+    return period
+
+
+def _parse(text: str, today: date) -> Period:
+
+    # Explicit ISO ranges and dates
+    match = re.search(ISO_DATE + DATE_SEPARATOR + ISO_DATE, text)
+    if match:
+        return _days(_parse_iso(match.group(1)), _parse_iso(match.group(2)))
+    match = re.search(r"(?:since|from|after)\s+" + ISO_DATE, text)
+    if match:
+        return _days(_parse_iso(match.group(1)), today)
+    match = re.search(ISO_DATE, text)
+    if match:
+        day = _parse_iso(match.group(1))
+        return _days(day, day)
+
+    # Quarters
+    match = re.search(r"\bq([1-4])\s*[-/ ]?\s*(\d{4})\b", text) or re.search(r"\b(\d{4})\s*[-/ ]?\s*q([1-4])\b", text)
+    if match:
+        first, second = match.groups()
+        return _quarter(int(second), int(first)) if len(first) == 1 else _quarter(int(first), int(second))
+
+    # Months by name or ISO year-month
+    match = re.search(rf"\b({MONTH_PATTERN})\.?\s*,?\s*(\d{{4}})\b", text)
+    if match:
+        return _month(int(match.group(2)), MONTHS[match.group(1)])
+    match = re.search(r"\b(\d{4})-(\d{1,2})\b", text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return _month(int(match.group(1)), int(match.group(2)))
+
+    # Rolling windows: "past 10 days", "last 3 months", "past week" (bare "last week" is the previous calendar week)
+    match = re.search(r"\b(?:(?:past|last|previous)\s+(\d+)|past)\s+(day|week|month|quarter|year)s?\b", text)
+    if match:
+        count, unit = max(1, int(match.group(1) or 1)), match.group(2)
+        label = f"past {count} {unit}s" if count > 1 else f"past {unit}"
+        # Go back N whole units from today and snap to that unit's boundary; the window ends today
+        if unit == "day":
+            return Period(today - timedelta(days=count - 1), today, "day", label)
+        if unit == "week":
+            return Period(_week_start(today - timedelta(weeks=count)), today, "week", label)
+        if unit == "month":
+            year, month = _shift_months(today.year, today.month, -count)
+            return Period(date(year, month, 1), today, "month", label)
+        if unit == "quarter":
+            year, month = _shift_months(today.year, today.month, -3 * count)
+            return Period(date(year, (month - 1) // 3 * 3 + 1, 1), today, "quarter", label)
+        return Period(date(today.year - count, 1, 1), today, "year", label)
+
+    # Year ranges and single years
+    match = re.search(r"\b(\d{4})\s*(?:-|–|—|to)\s*(\d{4})\b", text)
+    if match:
+        first, last = sorted((int(match.group(1)), int(match.group(2))))
+        return Period(date(first, 1, 1), date(last, 12, 31), "year", f"{first}-{last}")
+    match = re.search(r"\b((?:19|20)\d{2})\b", text)
+    if match:
+        return _year(int(match.group(1)))
+
+    # Fixed phrases
+    if "yesterday" in text:
+        return _days(today - timedelta(days=1), today - timedelta(days=1))
+    if "today" in text:
+        return _days(today, today)
+    if "this week" in text:
+        return _week(_week_start(today))
+    if "last week" in text:
+        return _week(_week_start(today) - timedelta(weeks=1))
+    if "this month" in text:
+        return _month(today.year, today.month)
+    if "last month" in text:
+        return _month(*_shift_months(today.year, today.month, -1))
+    if "this quarter" in text:
+        return _quarter(today.year, (today.month - 1) // 3 + 1)
+    if "last quarter" in text:
+        year, month = _shift_months(today.year, today.month, -3)
+        return _quarter(year, (month - 1) // 3 + 1)
+    if "this year" in text or "year to date" in text or "ytd" in text:
+        return _year(today.year)
+    if "last year" in text:
+        return _year(today.year - 1)
+
+    return Period(today - timedelta(days=DEFAULT_DAYS - 1), today, "day", f"past {DEFAULT_DAYS} days")
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+import json
+import os
+
+from rendering import write_summary_html
+from periods import Period
+
+PUBLISHED_DIR = "published"
+
+# Prebuilt summaries older than this are recomputed on demand; override with HEALTH_AGENT_PUBLISHED_MAX_AGE (seconds)
+DEFAULT_MAX_AGE = float(os.getenv("HEALTH_AGENT_PUBLISHED_MAX_AGE", 24 * 3600))
+
+
+def _published_path(period: Period, ext: str) -> str:
+    return os.path.join(PUBLISHED_DIR, f"{period.key}.{ext}")
+
+
+def publish_summary(summary: dict, period: Period, run_id: str):
+    """Publish a ready-made summary (JSON plus HTML report) for on-demand requests to reuse"""
+    os.makedirs(PUBLISHED_DIR, exist_ok=True)
+    record = {
+        "run_id": run_id,
+        "published_at": datetime.now().isoformat(timespec="seconds"),
+        "period_key": period.key,
+        "label": period.label,
+        "start_date": period.start_date,
+        "end_date": period.end_date,
+        "summary": summary,
+    }
+    path = _published_path(period, "json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    write_summary_html(summary, _published_path(period, "html"))
+
+
+def load_published(period: Period, max_age: float = DEFAULT_MAX_AGE) -> Optional[dict]:
+    """The published record for a period, or None if there isn't a fresh one"""
+    path = _published_path(period, "json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    age = (datetime.now() - datetime.fromisoformat(record["published_at"])).total_seconds()
+    return record if age <= max_age else None
@@ -0,0 +1,77 @@
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from datetime import datetime
+from typing import Iterable, Tuple
+import os
+import shutil
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+SUMMARY_SOURCES = ["Wikipedia", "DuckDuckGo", "PubMed", "ArXiv", "ClinicalTrials.gov"]
+
+# Templates are compiled on first use and kept for the life of the process;
+# auto_reload is off so cached templates are never re-checked against the disk.
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+)
+
+
+def _summary_context(summary: dict) -> dict:
+    return {"summary": summary, "sources": SUMMARY_SOURCES}
+
+
+def render_summary_html(summary: dict) -> str:
+    """Render a TimelineSummary dict to an HTML report"""
+    return _env.get_template("summary.html").render(_summary_context(summary))
+
+
+def write_summary_html(summary: dict, filename: str):
+    """Stream a TimelineSummary dict to an HTML file without building the whole page in memory"""
+    _env.get_template("summary.html").stream(_summary_context(summary)).dump(filename, encoding="utf-8")
+
+
+def write_timeline_html(data: str, filename: str):
+    """Stream free-form timeline data into the shared report layout"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _env.get_template("timeline.html").stream(data=data, timestamp=timestamp).dump(filename, encoding="utf-8")
+
+
+def _find_wkhtmltopdf():
+    path = os.getenv("WKHTMLTOPDF_PATH") or shutil.which("wkhtmltopdf")
+    if path:
+        return path
+    windows_default = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
+    return windows_default if os.path.exists(windows_default) else None
+
+
+def save_summary_pdfs(items: Iterable[Tuple[dict, str]]):
+    """Convert many (summary, pdf filename) pairs to PDF in one process.
+
+    WeasyPrint renders in-process, so a batch costs one interpreter rather than
+    one wkhtmltopdf launch per report. wkhtmltopdf (found via WKHTMLTOPDF_PATH
+    or PATH) is used as a fallback when WeasyPrint is not installed.
+    """
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError):
+        # WeasyPrint raises OSError on import when Pango/GTK is missing (the usual case on Windows)
+        HTML = None
+
+    if HTML is not None:
+        for summary, filename in items:
+            HTML(string=render_summary_html(summary), base_url=TEMPLATE_DIR).write_pdf(filename)
+        return
+
+    import pdfkit
+
+    wkhtmltopdf = _find_wkhtmltopdf()
+    if wkhtmltopdf is None:
+        raise RuntimeError("No PDF backend available: install weasyprint or set WKHTMLTOPDF_PATH")
+    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf)
+    for summary, filename in items:
+        pdfkit.from_string(render_summary_html(summary), filename, configuration=config)
+
+
+def save_summary_pdf(summary: dict, filename: str):
+    save_summary_pdfs([(summary, filename)])
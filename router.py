@@ -0,0 +1,217 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List
+import os
+import threading
+import time
+
+from latency import LatencyStats
+
+# Tiers are ordered model lists: the first model is preferred, the rest are fallbacks.
+# Override with comma-separated model ids, e.g. HEALTH_AGENT_MODELS_FAST="openai/gpt-4o-mini,google/gemini-flash-1.5"
+DEFAULT_TIERS = {
+    "fast": ["openai/gpt-4o-mini", "openrouter/quasar-alpha"],
+    "strong": ["openrouter/quasar-alpha", "openai/gpt-4o"],
+}
+
+# Latency SLOs in seconds; override with HEALTH_AGENT_SLO_FAST / HEALTH_AGENT_SLO_STRONG
+DEFAULT_SLOS = {
+    "fast": 10.0,
+    "strong": 120.0,
+}
+
+# Lightweight compression work goes to the fast tier, synthesis and analysis to the strong one
+TASK_TIERS = {
+    "tool_selection": "fast",
+    "synthesis": "strong",
+    "chat": "strong",
+    "deep_reasoning": "strong",
+    "impact_analysis": "strong",
+    "summarize": "fast",
+    "simplify_jargon": "fast",
+    "engaging_summary": "fast",
+    "chat_history_summary": "fast",
+}
+
+
+class _ModelStatsHandler(BaseCallbackHandler):
+    def __init__(self, stats: LatencyStats):
+        self.stats = stats
+        self._starts = {}
+
+    def on_llm_start(self, serialized, prompts, run_id=None, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, run_id=None, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        started = self._starts.pop(run_id, None)
+        # Cache hits (see caches.LLMResponseCache) never reached the model, so they say nothing about its latency
+        cached = any(
+            (generation.generation_info or {}).get("cached")
+            for generations in response.generations
+            for generation in generations
+        )
+        if started is not None and not cached:
+            self.stats.record(time.perf_counter() - started)
+
+    def on_llm_error(self, error, run_id=None, **kwargs):
+        self._starts.pop(run_id, None)
+        self.stats.record_error()
+
+
+class RoutedChatModel(Runnable):
+    """Agent-facing chat model that asks the router for the model order on every call.
+
+    The fallback chain is rebuilt per invocation from `models_for`, so a model that
+    starts breaching its SLO mid-session is moved behind healthy ones for the next
+    agent turn. Tools bound with `bind_tools` are re-applied to whichever models are chosen.
+    """
+
+    def __init__(self, router: "ModelRouter", task: str, temperature: float, streaming: bool, tools=None, tool_kwargs=None):
+        self.router = router
+        self.task = task
+        self.temperature = temperature
+        self.streaming = streaming
+        self.tools = tools
+        self.tool_kwargs = tool_kwargs or {}
+
+    def bind_tools(self, tools, **kwargs) -> "RoutedChatModel":
+        return RoutedChatModel(self.router, self.task, self.temperature, self.streaming, tools, kwargs)
+
+    def _current(self):
+        slo = self.router.slos[self.router._tier(self.task)]
+        models = []
+        for model in self.router.models_for(self.task):
+            llm = self.router._model(model, self.temperature, self.streaming, slo)
+            models.append(llm.bind_tools(self.tools, **self.tool_kwargs) if self.tools is not None else llm)
+        primary, *fallbacks = models
+        return primary.with_fallbacks(fallbacks) if fallbacks else primary
+
+    def invoke(self, input, config=None, **kwargs):
+        return self._current().invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self._current().ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        yield from self._current().stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in self._current().astream(input, config, **kwargs):
+            yield chunk
+
+
+class ModelRouter:
+    """Routes each task to a model tier and keeps per-model latency and error statistics.
+
+    Models whose recent p95 latency breaches the tier SLO are moved behind healthy
+    ones. `invoke` hedges: if the chosen model hasn't answered within its expected
+    latency, the same request is sent to the next model in the tier and whichever
+    answers first wins. Agent models returned by `get_llm` fall back to the next
+    model on errors or SLO timeouts instead.
+    """
+
+    min_samples = 5
+
+    def __init__(self, tiers: Dict[str, List[str]], slos: Dict[str, float], task_tiers: Dict[str, str]):
+        self.tiers = tiers
+        self.slos = slos
+        self.task_tiers = task_tiers
+        self.stats: Dict[str, LatencyStats] = {}
+        self._models = {}
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="model-hedge")
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        tiers = {
+            tier: [m.strip() for m in os.getenv(f"HEALTH_AGENT_MODELS_{tier.upper()}", "").split(",") if m.strip()] or models
+            for tier, models in DEFAULT_TIERS.items()
+        }
+        slos = {tier: float(os.getenv(f"HEALTH_AGENT_SLO_{tier.upper()}", slo)) for tier, slo in DEFAULT_SLOS.items()}
+        return cls(tiers, slos, TASK_TIERS)
+
+    def _tier(self, task: str) -> str:
+        return self.task_tiers.get(task, "strong")
+
+    def _stats(self, model: str) -> LatencyStats:
+        with self._lock:
+            if model not in self.stats:
+                self.stats[model] = LatencyStats()
+            return self.stats[model]
+
+    def _breaches_slo(self, model: str, slo: float) -> bool:
+        stats = self._stats(model)
+        return len(stats.samples) >= self.min_samples and stats.percentile(0.95) > slo
+
+    def models_for(self, task: str) -> List[str]:
+        """Models for a task, healthy ones first, keeping the configured preference otherwise"""
+        tier = self._tier(task)
+        slo = self.slos[tier]
+        return sorted(self.tiers[tier], key=lambda model: self._breaches_slo(model, slo))
+
+    def _model(self, model: str, temperature: float, streaming: bool, timeout: float) -> ChatOpenAI:
+        key = (model, temperature, streaming, timeout)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = ChatOpenAI(
+                    base_url="https://openrouter.ai/api/v1",
+                    model=model,
+                    temperature=temperature,
+                    streaming=streaming,
+                    timeout=timeout,
+                    max_retries=1,
+                    callbacks=[_ModelStatsHandler(self._stats(model))],
+                )
+            return self._models[key]
+
+    def get_llm(self, task: str, temperature: float = 0.5, streaming: bool = False) -> RoutedChatModel:
+        """Chat model for a task, falling back through the tier (in its current order) on errors or SLO timeouts"""
+        return RoutedChatModel(self, task, temperature, streaming)
+
+    def invoke(self, task: str, prompt, temperature: float = 0.5):
+        """Invoke a tier model with a hedged backup request; returns the first successful message"""
+        slo = self.slos[self._tier(task)]
+        models = self.models_for(task)
+        pending = {}
+        errors = []
+
+        def launch(model):
+            llm = self._model(model, temperature, False, slo)
+            pending[self._pool.submit(llm.invoke, prompt)] = model
+            return model
+
+        latest = launch(models[0])
+        remaining = models[1:]
+        while pending:
+            # Wait about as long as the most recently launched model usually takes before hedging again
+            stats = self._stats(latest)
+            hedge_after = min(stats.percentile(0.95), slo) if len(stats.samples) >= self.min_samples else slo
+            done, _ = wait(pending, timeout=hedge_after if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                if future.exception() is None:
+                    return future.result()
+                errors.append(future.exception())
+            if remaining and (not done or not pending):
+                latest = launch(remaining.pop(0))
+        raise errors[-1]
+
+    def report(self) -> str:
+        lines = []
+        for model, stats in sorted(self.stats.items()):
+            if not stats.calls:
+                continue
+            lines.append(
+                f"{model}: {stats.calls} calls, mean {stats.mean():.1f}s, "
+                f"p95 {stats.percentile(0.95):.1f}s, p99 {stats.percentile(0.99):.1f}s, "
+                f"errors {stats.error_rate():.0%}"
+            )
+        return "\n".join(lines)
+
+
+model_router = ModelRouter.from_env()
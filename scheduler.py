@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from main import build_timeline_request, generate_summary
+from checkpoint import RunCheckpoint
+from published import publish_summary
+from periods import parse_period
+from caches import enable_llm_cache
+
+SCHEDULE_FILE = "schedule.json"
+
+# Used when schedule.json doesn't exist: the periods users ask for most, precomputed overnight
+DEFAULT_SCHEDULE = {
+    "max_concurrency": 1,
+    "jitter_seconds": 300,
+    "jobs": [
+        {"period": "last week", "cron": "0 2 * * *"},
+        {"period": "last month", "cron": "20 2 * * *"},
+        {"period": "this year", "cron": "40 2 * * *"},
+    ],
+}
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> set:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step != 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field '{field}' (allowed range {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        # Both 0 and 7 mean Sunday
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}
+        self._days_restricted = not fields[2].startswith("*")
+        self._weekdays_restricted = not fields[4].startswith("*")
+
+    def matches(self, moment: datetime) -> bool:
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either one matching is enough
+        if self._days_restricted and self._weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+
+class WarmJob:
+    def __init__(self, period: str, cron: str):
+        self.period = period
+        self.schedule = CronSchedule(cron)
+
+
+def load_schedule(path: str = SCHEDULE_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {**DEFAULT_SCHEDULE, **json.load(f)}
+    except FileNotFoundError:
+        return DEFAULT_SCHEDULE
+
+
+def warm_period(period_text: str, jitter: float):
+    """Precompute and publish one period, warming the search and LLM caches on the way"""
+    # Spread jobs out so warming several periods doesn't hit upstream rate limits at once
+    time.sleep(random.uniform(0, jitter))
+
+    period = parse_period(period_text)
+    start_date, end_date = period.start_date, period.end_date
+    print(f"🔥 Warming '{period_text}' ({start_date} to {end_date})...")
+    checkpoint = RunCheckpoint.create(build_timeline_request(start_date, end_date), start_date, end_date, period.key)
+    try:
+        summary = generate_summary(checkpoint, show_output=False)
+        if summary is None:
+            return
+        publish_summary(summary, period, checkpoint.run_id)
+    except Exception as e:
+        print(f"❌ Warming '{period_text}' failed: {e} (resume with: python main.py --resume {checkpoint.run_id})")
+        return
+    print(f"✅ Published '{period_text}' ({start_date} to {end_date}).")
+
+
+def _coalesce(jobs: List[WarmJob]) -> List[WarmJob]:
+    """Drop jobs whose period resolves to the same range as an earlier one (e.g. 'this year' and '2026')"""
+    unique = {}
+    for job in jobs:
+        unique.setdefault(parse_period(job.period).key, job)
+    return list(unique.values())
+
+
+def _report_crash(period_text: str, future):
+    if future.exception() is not None:
+        print(f"❌ Warming '{period_text}' crashed: {future.exception()}")
+
+
+def run_once(jobs: List[WarmJob], max_concurrency: int, jitter: float) -> bool:
+    """Warm every job now; True if none of them raised"""
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {pool.submit(warm_period, job.period, jitter): job for job in _coalesce(jobs)}
+    for future, job in futures.items():
+        _report_crash(job.period, future)
+    return all(future.exception() is None for future in futures)
+
+
+def run_daemon(jobs: List[WarmJob], max_concurrency: int, jitter: float):
+    pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="warm")
+    running = {}
+    print(f"🕑 Scheduler started with {len(jobs)} job(s), up to {max_concurrency} at a time.")
+    while True:
+        now = datetime.now().replace(second=0, microsecond=0)
+        for job in _coalesce([job for job in jobs if job.schedule.matches(now)]):
+            # Skip a tick if the same range is still being warmed from an earlier tick
+            key = parse_period(job.period).key
+            if key not in running or running[key].done():
+                running[key] = pool.submit(warm_period, job.period, jitter)
+                running[key].add_done_callback(lambda future, period=job.period: _report_crash(period, future))
+        next_minute = now + timedelta(minutes=1)
+        time.sleep(max(0.0, (next_minute - datetime.now()).total_seconds()))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Precompute and publish health timelines on a schedule")
+    arg_parser.add_argument("--config", default=SCHEDULE_FILE, help="Schedule file (JSON with max_concurrency, jitter_seconds and jobs)")
+    arg_parser.add_argument("--once", action="store_true", help="Warm every configured period now and exit")
+    args = arg_parser.parse_args()
+
+    schedule = load_schedule(args.config)
+    jobs = [WarmJob(job["period"], job["cron"]) for job in schedule["jobs"]]
+    max_concurrency = max(1, int(schedule["max_concurrency"]))
+    jitter = float(schedule["jitter_seconds"])
+
+    # Warm runs fill the LLM cache that on-demand runs read; set HEALTH_AGENT_LLM_CACHE=0 to disable
+    if os.getenv("HEALTH_AGENT_LLM_CACHE", "1") != "0":
+        enable_llm_cache()
+
+    if args.once:
+        if not run_once(jobs, max_concurrency, jitter):
+            sys.exit(1)
+    else:
+        run_daemon(jobs, max_concurrency, jitter)
+
+if __name__ == "__main__":
+    main()
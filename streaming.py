@@ -0,0 +1,177 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.utils.json import parse_partial_json
+from typing import Optional
+import sys
+import time
+from rendering import write_summary_html
+
+SUMMARY_DEFAULTS = {
+    "time_period": "",
+    "key_findings": "",
+    "major_trends": [],
+    "notable_developments": [],
+    "patient_impact": "",
+    "future_outlook": "",
+    "tools_used": [],
+}
+
+# Tag for LLM runs whose answer is only a draft (see main.run_timeline)
+DRAFT_TAG = "draft_answer"
+
+
+def _complete_developments(text: str) -> int:
+    """Number of notable_developments objects already followed by a "," or "]" separator"""
+    key = text.find('"notable_developments"')
+    bracket = text.find("[", key) if key != -1 else -1
+    if bracket == -1:
+        return 0
+
+    count = depth = 0
+    in_string = escaped = closed = False
+    for char in text[bracket + 1:]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char.isspace():
+            continue
+        if closed and char in ",]":
+            count += 1
+        closed = False
+        if char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            closed = depth == 0
+        elif char == "]" and depth == 0:
+            break
+    return count
+
+
+class TimelineStreamHandler(BaseCallbackHandler):
+    """Streams agent progress to the terminal and renders the report as developments arrive.
+
+    Tool start/end events and LLM token deltas are printed as they happen. While the
+    final JSON answer streams in, it is parsed incrementally and the HTML report is
+    re-rendered every time another development is complete.
+    """
+
+    def __init__(self, html_path: str = "health_summary.html"):
+        self.html_path = html_path
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.first_render_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.rendered_developments = 0
+        self._buffer = ""
+        self._calls_tools = False
+        self._draft = False
+        self._tool_starts = {}
+
+    def on_llm_start(self, serialized, prompts, tags=None, **kwargs):
+        self._start_turn(tags)
+
+    def on_chat_model_start(self, serialized, messages, tags=None, **kwargs):
+        self._start_turn(tags)
+
+    def _start_turn(self, tags=None):
+        self._buffer = ""
+        self._calls_tools = False
+        # Draft answers are rewritten by another model, so they are never rendered
+        self._draft = DRAFT_TAG in (tags or [])
+
+    def on_llm_new_token(self, token: str, chunk=None, **kwargs):
+        message = getattr(chunk, "message", None)
+        if getattr(message, "tool_call_chunks", None):
+            self._calls_tools = True
+        if not token:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+        self._buffer += token
+        # A development is complete once its closing brace is followed by "," or "]"
+        if "," in token or "]" in token:
+            self._render_partial(final=False)
+
+    def on_llm_end(self, response, **kwargs):
+        if not self._buffer:
+            return
+        sys.stdout.write("\n")
+        generations = response.generations[0] if response.generations else []
+        message = getattr(generations[0], "message", None) if generations else None
+        # Turns that call tools are scratch work, not the final answer
+        if not self._calls_tools and not getattr(message, "tool_calls", None):
+            self._render_partial(final=True)
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        name = (serialized or {}).get("name", "tool")
+        self._tool_starts[run_id] = (name, time.perf_counter())
+        print(f"\n🔧 {name} started: {str(input_str)[:120]}")
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        name, started = self._tool_starts.pop(run_id, ("tool", time.perf_counter()))
+        print(f"✔️ {name} finished in {time.perf_counter() - started:.1f}s ({len(str(output))} chars)")
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        name, started = self._tool_starts.pop(run_id, ("tool", time.perf_counter()))
+        print(f"❌ {name} failed after {time.perf_counter() - started:.1f}s: {error}")
+
+    def _json_start(self) -> int:
+        """Offset of the answer's JSON object, or -1 if the turn isn't a JSON answer"""
+        text = self._buffer.lstrip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1].lstrip() if "\n" in text else ""
+        if not text.startswith("{"):
+            return -1
+        return self._buffer.find("{")
+
+    def _render_partial(self, final: bool):
+        start = self._json_start()
+        if start == -1 or self._calls_tools or self._draft:
+            return
+
+        if not final:
+            complete = _complete_developments(self._buffer[start:])
+            if complete <= self.rendered_developments:
+                return
+
+        parsed = parse_partial_json(self._buffer[start:])
+        if not isinstance(parsed, dict) or "notable_developments" not in parsed:
+            return
+
+        developments = [dev for dev in parsed.get("notable_developments") or [] if isinstance(dev, dict)]
+        if not final:
+            developments = developments[:complete]
+
+        summary = {**SUMMARY_DEFAULTS, **parsed, "notable_developments": developments}
+        write_summary_html(summary, self.html_path)
+
+        if self.first_render_at is None and developments:
+            self.first_render_at = time.perf_counter()
+        self.rendered_developments = len(developments)
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def metrics(self) -> dict:
+        def elapsed(moment):
+            return None if moment is None else round(moment - self.started_at, 2)
+
+        return {
+            "time_to_first_token_s": elapsed(self.first_token_at),
+            "time_to_first_development_s": elapsed(self.first_render_at),
+            "total_latency_s": elapsed(self.finished_at),
+        }
+
+    def print_metrics(self):
+        for name, value in self.metrics().items():
+            print(f"⏱️ {name}: {'n/a' if value is None else f'{value}s'}")
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from periods import parse_period
+
+MONDAY = date(2026, 10, 19)
+
+
+@pytest.mark.parametrize(
+    "text, today, start, end",
+    [
+        # Rolling windows go back N whole units and snap to that unit's boundary
+        ("past 7 days", MONDAY, date(2026, 10, 13), MONDAY),
+        ("past day", MONDAY, MONDAY, MONDAY),
+        ("past week", MONDAY, date(2026, 10, 12), MONDAY),
+        ("past 3 weeks", MONDAY, date(2026, 9, 28), MONDAY),
+        ("past month", date(2026, 3, 1), date(2026, 2, 1), date(2026, 3, 1)),
+        ("last 3 months", date(2026, 3, 1), date(2025, 12, 1), date(2026, 3, 1)),
+        ("past quarter", date(2026, 1, 2), date(2025, 10, 1), date(2026, 1, 2)),
+        ("past 2 quarters", MONDAY, date(2026, 4, 1), MONDAY),
+        ("past month", date(2026, 1, 2), date(2025, 12, 1), date(2026, 1, 2)),
+        ("past year", date(2026, 1, 2), date(2025, 1, 1), date(2026, 1, 2)),
+        ("past 2 years", MONDAY, date(2024, 1, 1), MONDAY),
+        # Current units end today
+        ("this week", MONDAY, MONDAY, MONDAY),
+        ("this month", MONDAY, date(2026, 10, 1), MONDAY),
+        ("this quarter", MONDAY, date(2026, 10, 1), MONDAY),
+        ("ytd", MONDAY, date(2026, 1, 1), MONDAY),
+        ("year to date", MONDAY, date(2026, 1, 1), MONDAY),
+        # Bare "last" is the previous calendar unit
+        ("last week", MONDAY, date(2026, 10, 12), date(2026, 10, 18)),
+        ("last month", date(2026, 1, 2), date(2025, 12, 1), date(2025, 12, 31)),
+        ("last quarter", date(2026, 1, 2), date(2025, 10, 1), date(2025, 12, 31)),
+        ("last year", MONDAY, date(2025, 1, 1), date(2025, 12, 31)),
+        # Explicit ranges
+        ("Q1 2025", MONDAY, date(2025, 1, 1), date(2025, 3, 31)),
+        ("March 2024", MONDAY, date(2024, 3, 1), date(2024, 3, 31)),
+        ("2023-2024", MONDAY, date(2023, 1, 1), date(2024, 12, 31)),
+        ("2024-01-15 to 2024-02-10", MONDAY, date(2024, 1, 15), date(2024, 2, 10)),
+        ("since 2026-10-01", MONDAY, date(2026, 10, 1), MONDAY),
+        ("Q1 2027", MONDAY, date(2027, 1, 1), date(2027, 3, 31)),
+        ("whenever", MONDAY, date(2026, 7, 22), MONDAY),
+    ],
+)
+def test_parse_period(text, today, start, end):
+    period = parse_period(text, today=today)
+    assert (period.start, period.end) == (start, end)
+
+
+def test_equal_requests_share_a_key():
+    assert parse_period("past 3 months", today=MONDAY).key == parse_period("last 3 months", today=MONDAY).key
+    assert parse_period("past 3 months", today=MONDAY).key != parse_period("past 2 months", today=MONDAY).key
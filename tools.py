@@ -2,24 +2,49 @@ from langchain_community.tools import WikipediaQueryRun, DuckDuckGoSearchRun
 from langchain_community.utilities import WikipediaAPIWrapper, PubMedAPIWrapper, ArxivAPIWrapper
 from langchain_core.tools import Tool
 from datetime import datetime
-from langchain.chains.summarize import load_summarize_chain
-from langchain_core.documents import Document
-from langchain_openai import ChatOpenAI
-from langchain.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
+import functools
 import requests
 import json
 import re
 from bs4 import BeautifulSoup
 from typing import Optional
-
-# Initialize shared LLM configurations
-def get_llm(temperature=0.5):
-    return ChatOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        model="openrouter/quasar-alpha",  
-        temperature=temperature
-)
+from rendering import write_timeline_html
+from router import model_router
+from call_policy import call_policy, PARTIAL_PREFIX
+from caches import ToolResultCache
+
+# Search results are cached on disk (see caches.py), so later chat turns, repeated
+# agent calls and runs warmed by the scheduler reuse earlier lookups
+tool_result_cache = ToolResultCache()
+
+def cached_tool_result(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = ToolResultCache.make_key(func.__name__, args, kwargs)
+        cached = tool_result_cache.get(key)
+        if cached is not None:
+            return cached
+        result = func(*args, **kwargs)
+        # Don't pin failures or partial results in the cache; the next call should retry
+        if isinstance(result, str) and not result.startswith(("Error", PARTIAL_PREFIX)):
+            tool_result_cache.set(key, result)
+        return result
+    return wrapper
+
+# Every backend call below goes through call_policy, which enforces per-source
+# deadlines, hedges slow requests and marks timed-out or skipped sources as partial.
+# The PubMed, arXiv and Wikipedia wrappers take no HTTP timeout, so a stalled request
+# can only hold one of its own source's workers; the ones we make ourselves pass one.
+ddg_search = DuckDuckGoSearchRun()
+
+def web_search(search_query: str) -> str:
+    return call_policy.call("duckduckgo", ddg_search.run, search_query).as_text("No web results available.")
+
+def fetch_json(url: str, params: dict, timeout: float) -> dict:
+    response = requests.get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
 
 # PubMed API Wrapper setup
 pubmed = PubMedAPIWrapper(top_k_results=7)
@@ -28,6 +53,7 @@ pubmed = PubMedAPIWrapper(top_k_results=7)
 arxiv = ArxivAPIWrapper(top_k_results=5)
 
 # Tool implementations for health timeline scanner
+@cached_tool_result
 def search_health_news_impl(query: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search for health and medical news between specified dates"""
     search_query = f"health medical news"
@@ -41,9 +67,9 @@ def search_health_news_impl(query: str, start_date: Optional[str] = None, end_da
         search_query += f" from {start_date} to {end_date}"
     
     # Using DuckDuckGo search as a proxy for news search
-    results = DuckDuckGoSearchRun().run(search_query)
-    return results
+    return web_search(search_query)
 
+@cached_tool_result
 def search_pubmed_impl(query: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search PubMed for medical research papers"""
     # Handle general queries
@@ -60,12 +86,9 @@ def search_pubmed_impl(query: str, start_date: Optional[str] = None, end_date: O
         end_clean = end_date.replace("-", "")
         search_query += f" AND ({start_clean}[Date - Publication] : {end_clean}[Date - Publication])"
     
-    try:
-        results = pubmed.run(search_query)
-        return results
-    except Exception as e:
-        return f"Error searching PubMed: {str(e)}. Using fallback search method."
+    return call_policy.call("pubmed", pubmed.run, search_query).as_text("No PubMed results available.")
 
+@cached_tool_result
 def search_arxiv_impl(query: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search arXiv for recent scientific papers"""
     # Handle general queries
@@ -74,9 +97,12 @@ def search_arxiv_impl(query: str, start_date: Optional[str] = None, end_date: Op
     else:
         search_query = query
         
+    search = call_policy.call("arxiv", arxiv.run, search_query)
+    if search.partial:
+        return search.as_text("No arXiv results available.")
+    results = search.value
+
     try:
-        results = arxiv.run(search_query)
-        
         # Manual filtering by date if specified (ArXiv API doesn't support date filtering directly)
         if start_date and end_date:
             filtered_results = ""
@@ -97,6 +123,7 @@ def search_arxiv_impl(query: str, start_date: Optional[str] = None, end_date: Op
     except Exception as e:
         return f"Error searching arXiv: {str(e)}. Using fallback search method."
 
+@cached_tool_result
 def search_clinical_trials_impl(condition: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search for clinical trials related to a health condition registered between dates"""
     base_url = "https://clinicaltrials.gov/api/query/study_fields"
@@ -123,34 +150,36 @@ def search_clinical_trials_impl(condition: str, start_date: Optional[str] = None
         formatted_end = end_date.replace("-", "/")
         params["expr"] += f" AND AREA[LastUpdatePostDate]RANGE[{formatted_start},{formatted_end}]"
     
-    try:
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            studies = data.get("StudyFieldsResponse", {}).get("StudyFields", [])
-            
-            if not studies:
-                return "No clinical trials found matching the criteria."
-            
-            # Format results
-            result_str = "Clinical Trials Found:\n\n"
-            for study in studies:
-                result_str += f"ID: {', '.join(study.get('NCTId', ['Unknown']))}\n"
-                result_str += f"Title: {', '.join(study.get('BriefTitle', ['Unknown']))}\n"
-                result_str += f"Condition: {', '.join(study.get('Condition', ['Unknown']))}\n"
-                result_str += f"Phase: {', '.join(study.get('Phase', ['Unknown']))}\n"
-                result_str += f"Last Updated: {', '.join(study.get('LastUpdatePostDate', ['Unknown']))}\n\n"
-            
-            return result_str
-        else:
-            return f"Error searching clinical trials: Status code {response.status_code}. Using fallback search method."
-    except Exception as e:
+    trials = call_policy.call(
+        "clinicaltrials", fetch_json, base_url, params, timeout=call_policy.deadline("clinicaltrials")
+    )
+    if trials.partial:
         search_query = f"{condition} clinical trial registered"
         if start_date and end_date:
             search_query += f" from {start_date} to {end_date}"
-        results = DuckDuckGoSearchRun().run(search_query)
-        return f"Error accessing ClinicalTrials.gov API: {str(e)}. Using search results instead:\n\n{results}"
+        results = web_search(search_query)
+        return f"{trials.marker()}\nClinicalTrials.gov API unavailable. Using search results instead:\n\n{results}"
+
+    try:
+        studies = trials.value.get("StudyFieldsResponse", {}).get("StudyFields", [])
+        
+        if not studies:
+            return "No clinical trials found matching the criteria."
+        
+        # Format results
+        result_str = "Clinical Trials Found:\n\n"
+        for study in studies:
+            result_str += f"ID: {', '.join(study.get('NCTId', ['Unknown']))}\n"
+            result_str += f"Title: {', '.join(study.get('BriefTitle', ['Unknown']))}\n"
+            result_str += f"Condition: {', '.join(study.get('Condition', ['Unknown']))}\n"
+            result_str += f"Phase: {', '.join(study.get('Phase', ['Unknown']))}\n"
+            result_str += f"Last Updated: {', '.join(study.get('LastUpdatePostDate', ['Unknown']))}\n\n"
+        
+        return result_str
+    except Exception as e:
+        return f"Error reading clinical trials response: {str(e)}."
 
+@cached_tool_result
 def search_fda_approvals_impl(drug_type: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search for FDA drug or device approvals between specified dates"""
     # Initialize with general query if not specified
@@ -166,17 +195,12 @@ def search_fda_approvals_impl(drug_type: str, start_date: Optional[str] = None,
     else:
         search_query = drug_query
     
-    # Try to get data from FDA's website directly
-    try:
-        # This would be replaced with actual FDA API implementation if available
-        results = DuckDuckGoSearchRun().run(search_query)
-        
-        # Enhance the results by extracting from FDA press releases if we had API access
-        # For now, return search results
-        return results
-    except Exception as e:
-        return f"Error searching FDA approvals: {str(e)}. Using fallback search method."
+    # This would be replaced with actual FDA API implementation if available
+    # Enhance the results by extracting from FDA press releases if we had API access
+    # For now, return search results
+    return web_search(search_query)
 
+@cached_tool_result
 def search_health_agencies_impl(query: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search for health guidelines and announcements from major health agencies (CDC, WHO, NIH)"""
     # Handle general queries
@@ -189,9 +213,9 @@ def search_health_agencies_impl(query: str, start_date: Optional[str] = None, en
     if start_date and end_date:
         search_query += f" from {start_date} to {end_date}"
     
-    results = DuckDuckGoSearchRun().run(search_query)
-    return results
+    return web_search(search_query)
 
+@cached_tool_result
 def search_medical_breakthroughs_impl(query: str = "", start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search specifically for medical breakthroughs and innovations"""
     search_query = "medical breakthrough OR healthcare innovation OR scientific discovery medicine OR new treatment approved"
@@ -204,9 +228,9 @@ def search_medical_breakthroughs_impl(query: str = "", start_date: Optional[str]
     if start_date and end_date:
         search_query += f" from {start_date} to {end_date}"
     
-    results = DuckDuckGoSearchRun().run(search_query)
-    return results
+    return web_search(search_query)
 
+@cached_tool_result
 def search_medical_journals_impl(query: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
     """Search medical journals for research published between specified dates"""
     # First try PubMed as the primary source for medical literature
@@ -217,19 +241,29 @@ def search_medical_journals_impl(query: str, start_date: Optional[str] = None, e
     if start_date and end_date:
         search_query += f" from {start_date} to {end_date}"
     
-    general_results = DuckDuckGoSearchRun().run(search_query)
+    general_results = web_search(search_query)
     
-    # Combine results
+    # Combine results, surfacing any partial marker at the top
     combined = f"PubMed Results:\n{pubmed_results}\n\nAdditional Results:\n{general_results}"
+    partial_markers = [r.split("\n", 1)[0] for r in (pubmed_results, general_results) if r.startswith(PARTIAL_PREFIX)]
+    if partial_markers:
+        combined = "\n".join(partial_markers) + "\n" + combined
     return combined
 
+wikipedia = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=2, doc_content_chars_max=3000))
+
+@cached_tool_result
+def search_wikipedia_impl(query: str) -> str:
+    """Search Wikipedia for a health or medical topic"""
+    return call_policy.call("wikipedia", wikipedia.run, query).as_text("No Wikipedia results available.")
+
 def save_to_txt(data: str, filename: str = "health_timeline.txt") -> str:
     """Save timeline data to a text file"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     formatted_text = f"--- Health Timeline Report ---\nGenerated: {timestamp}\n\n{data}\n\n"
 
     try:
-        with open(filename, "w", encoding="utf-8") as f:  # Using 'w' instead of 'a' to overwrite
+        with open(filename, "a", encoding="utf-8") as f:  # Append so earlier reports are kept
             f.write(formatted_text)
         
         return f"Timeline successfully saved to {filename}"
@@ -238,103 +272,14 @@ def save_to_txt(data: str, filename: str = "health_timeline.txt") -> str:
 
 def save_to_html(data: str, filename: str = "health_timeline.html") -> str:
     """Save timeline data to an HTML file with formatting for email sharing"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create HTML with modern styling
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Health Timeline Report</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 800px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            h1 {{
-                color: #2c3e50;
-                border-bottom: 2px solid #3498db;
-                padding-bottom: 10px;
-            }}
-            h2 {{
-                color: #2980b9;
-                margin-top: 25px;
-            }}
-            .timestamp {{
-                color: #7f8c8d;
-                font-style: italic;
-                margin-bottom: 25px;
-            }}
-            .development {{
-                background-color: #f9f9f9;
-                border-left: 4px solid #3498db;
-                padding: 15px;
-                margin-bottom: 15px;
-                border-radius: 0 4px 4px 0;
-            }}
-            .development-title {{
-                font-weight: bold;
-                color: #2c3e50;
-            }}
-            .development-date {{
-                color: #7f8c8d;
-                font-size: 0.9em;
-            }}
-            .development-category {{
-                display: inline-block;
-                background-color: #3498db;
-                color: white;
-                padding: 3px 8px;
-                border-radius: 12px;
-                font-size: 0.8em;
-                margin-top: 8px;
-            }}
-            .source {{
-                font-size: 0.85em;
-                color: #7f8c8d;
-                margin-top: 10px;
-            }}
-            .footer {{
-                margin-top: 40px;
-                font-size: 0.8em;
-                color: #7f8c8d;
-                text-align: center;
-                border-top: 1px solid #ecf0f1;
-                padding-top: 10px;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>Health Timeline Report</h1>
-        <div class="timestamp">Generated: {timestamp}</div>
-        
-        {data}
-        
-        <div class="footer">
-            Generated by Health Timeline Scanner
-        </div>
-    </body>
-    </html>
-    """
-    
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(html_content)
-        
+        write_timeline_html(data, filename)
         return f"Timeline successfully saved to {filename}"
     except Exception as e:
         return f"Error saving to HTML file: {str(e)}"
 
 def create_engaging_summary(text: str) -> str:
     """Create an engaging, captivating summary of medical developments"""
-    llm = get_llm(temperature=0.7)  # Higher temperature for more engaging writing
-    
     prompt_template = """
     You are a brilliant science communicator specializing in making complex medical developments exciting and accessible to everyone.
     
@@ -362,26 +307,26 @@ def create_engaging_summary(text: str) -> str:
         template=prompt_template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.invoke({"text": text})
+    # Higher temperature for more engaging writing
+    response = model_router.invoke("engaging_summary", prompt.format_prompt(text=text), temperature=0.7)
     
-    return response["text"]
+    return response.content
 
 def summarize_text(text: str) -> str:
     """Summarize long text content"""
     if len(text) < 500:  # If text is already short, return as is
         return text
         
-    doc = Document(page_content=text)
-    llm = get_llm(temperature=0.3)  # Lower temperature for factual summary
-    chain = load_summarize_chain(llm, chain_type="stuff")
-    summary = chain.invoke([doc])
-    return summary["output_text"]
+    prompt = PromptTemplate(
+        input_variables=["text"],
+        template='Write a concise summary of the following:\n\n\n"{text}"\n\n\nCONCISE SUMMARY:'
+    )
+    # Lower temperature for factual summary
+    summary = model_router.invoke("summarize", prompt.format_prompt(text=text), temperature=0.3)
+    return summary.content
 
 def simplify_medical_jargon(text: str) -> str:
     """Convert medical jargon to plain language explanations"""
-    llm = get_llm(temperature=0.4)
-    
     prompt_template = """
     You are an expert at translating complex medical language into clear, accessible explanations.
     
@@ -403,15 +348,12 @@ def simplify_medical_jargon(text: str) -> str:
         template=prompt_template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.invoke({"text": text})
+    response = model_router.invoke("simplify_jargon", prompt.format_prompt(text=text), temperature=0.4)
     
-    return response["text"]
+    return response.content
 
 def deep_reasoning(query: str) -> str:
     """Analyze complex health trends through structured reasoning"""
-    llm = get_llm(temperature=0.3)
-    
     prompt_template = """
     You are a medical analysis engine designed to analyze health and medical trends through careful reasoning.
     
@@ -433,15 +375,12 @@ def deep_reasoning(query: str) -> str:
         template=prompt_template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.invoke({"query": query})
+    response = model_router.invoke("deep_reasoning", prompt.format_prompt(query=query), temperature=0.3)
     
-    return response["text"]
+    return response.content
 
 def health_impact_analysis(development: str) -> str:
     """Analyze the potential impact of a health development on different populations"""
-    llm = get_llm(temperature=0.4)
-    
     prompt_template = """
     You are a healthcare impact analyst who specializes in understanding how medical developments affect real people.
     
@@ -463,10 +402,9 @@ def health_impact_analysis(development: str) -> str:
         template=prompt_template
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.invoke({"development": development})
+    response = model_router.invoke("impact_analysis", prompt.format_prompt(development=development), temperature=0.4)
     
-    return response["text"]
+    return response.content
 
 # Tool definitions
 save_timeline_to_file = Tool(
@@ -561,7 +499,7 @@ health_impact_tool = Tool(
 
 wiki_tool = Tool(
     name="wikipedia",
-    func=WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=2, doc_content_chars_max=3000)).run,
+    func=search_wikipedia_impl,
     description="Search Wikipedia for information about a health or medical topic."
 )
 